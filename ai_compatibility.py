@@ -1,13 +1,14 @@
+import json
 import os
 import sys
 import platform
+import subprocess
 from uuid import uuid4
 from typing import Optional
 
 import streamlit as st
 from loguru import logger
 from pydantic import BaseModel, Field, ValidationError
-from pydantic.v2 import PydanticV2Model  # Ensure you are using Pydantic v2
 
 # Add the root directory of the project to the system path to allow importing modules from the project
 root_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
@@ -20,31 +21,21 @@ if root_dir not in sys.path:
 from app.config import config
 from app.models.const import FILE_TYPE_IMAGES, FILE_TYPE_VIDEOS
 from app.models.schema import MaterialInfo, VideoAspect, VideoConcatMode, VideoParams
-from app.services import llm, voice
-from app.services import task as tm
 from app.utils import utils
 
-st.set_page_config(
-    page_title="MoneyPrinterTurbo",
-    page_icon="🤖",
-    layout="wide",
-    initial_sidebar_state="auto",
-    menu_items={
-        "Report a bug": "https://github.com/harry0703/MoneyPrinterTurbo/issues",
-        "About": "# MoneyPrinterTurbo\nSimply provide a topic or keyword for a video, and it will "
-        "automatically generate the video copy, video materials, video subtitles, "
-        "and video background music before synthesizing a high-definition short "
-        "video.\n\nhttps://github.com/harry0703/MoneyPrinterTurbo",
-    },
-)
+MENU_ITEMS = {
+    "Report a bug": "https://github.com/harry0703/MoneyPrinterTurbo/issues",
+    "About": "# MoneyPrinterTurbo\nSimply provide a topic or keyword for a video, and it will "
+    "automatically generate the video copy, video materials, video subtitles, "
+    "and video background music before synthesizing a high-definition short "
+    "video.\n\nhttps://github.com/harry0703/MoneyPrinterTurbo",
+}
 
-hide_streamlit_style = """
+HIDE_STREAMLIT_STYLE = """
 <style>#root > div:nth-child(1) > div > div > div > div > section > div {padding-top: 0rem;}</style>
 """
-st.markdown(hide_streamlit_style, unsafe_allow_html=True)
-st.title(f"MoneyPrinterTurbo v{config.project_version}")
 
-support_locales = [
+SUPPORT_LOCALES = (
     "zh-CN",
     "zh-HK",
     "zh-TW",
@@ -53,72 +44,165 @@ support_locales = [
     "fr-FR",
     "vi-VN",
     "th-TH",
-]
+)
+
+LLM_PROVIDERS = (
+    "OpenAI",
+    "Moonshot",
+    "Azure",
+    "Qwen",
+    "DeepSeek",
+    "Gemini",
+    "Ollama",
+    "G4f",
+    "OneAPI",
+    "Cloudflare",
+    "ERNIE",
+)
+_PROVIDER_INDEX = {p.lower(): i for i, p in enumerate(LLM_PROVIDERS)}
+
+st.set_page_config(
+    page_title="MoneyPrinterTurbo",
+    page_icon="🤖",
+    layout="wide",
+    initial_sidebar_state="auto",
+    menu_items=MENU_ITEMS,
+)
+
+st.markdown(HIDE_STREAMLIT_STYLE, unsafe_allow_html=True)
+st.title(f"MoneyPrinterTurbo v{config.project_version}")
+
+_PLATFORM = platform.system()
+_OPEN_CMD = {"Windows": ["explorer"], "Darwin": ["open"], "Linux": ["xdg-open"]}.get(
+    _PLATFORM
+)
+
+LLM_CONFIG_KEYS = ("api_key", "secret_key", "base_url", "model_name", "account_id")
 
 font_dir = os.path.join(root_dir, "resource", "fonts")
 song_dir = os.path.join(root_dir, "resource", "songs")
 i18n_dir = os.path.join(root_dir, "webui", "i18n")
 config_file = os.path.join(root_dir, "webui", ".streamlit", "webui.toml")
-system_locale = utils.get_system_locale()
-# print(f"******** system locale: {system_locale} ********")
+_STORAGE_ROOT = os.path.join(root_dir, "storage")
+_TASKS_ROOT = os.path.join(_STORAGE_ROOT, "tasks")
+
+
+@st.cache_resource(show_spinner=False)
+def _sys_locale():
+    return utils.get_system_locale()
+
+
+st.session_state.setdefault("video_subject", "")
+st.session_state.setdefault("video_script", "")
+st.session_state.setdefault("video_terms", "")
+st.session_state.setdefault("ui_language", config.ui.get("language", _sys_locale()))
+
+
+_SCROLL_JS = """
+<script>
+    console.log("scroll_to_bottom");
+    function scroll(dummy_var_to_force_repeat_execution){
+        var sections = parent.document.querySelectorAll('section.main');
+        console.log(sections);
+        for(let index = 0; index<sections.length; index++) {
+            sections[index].scrollTop = sections[index].scrollHeight;
+        }
+    }
+    scroll(1);
+</script>
+"""
+
+
+def _scan_dir(directory, extensions):
+    # the resource directories are flat, which is also what the mtime-keyed
+    # listing cache assumes
+    try:
+        with os.scandir(directory) as it:
+            return [e.name for e in it if e.name.endswith(extensions) and e.is_file()]
+    except FileNotFoundError:
+        return []
 
-if "video_subject" not in st.session_state:
-    st.session_state["video_subject"] = ""
-if "video_script" not in st.session_state:
-    st.session_state["video_script"] = ""
-if "video_terms" not in st.session_state:
-    st.session_state["video_terms"] = ""
-if "ui_language" not in st.session_state:
-    st.session_state["ui_language"] = config.ui.get("language", system_locale)
+
+def _listing_cache_file(kind):
+    return os.path.join(_STORAGE_ROOT, f".listing_cache_{kind}.json")
+
+
+def _load_listing_cache(kind, mtime):
+    try:
+        with open(_listing_cache_file(kind), "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cached, dict) or cached.get("mtime") != mtime:
+        return None
+    names = cached.get("names")
+    if not isinstance(names, list) or not all(isinstance(n, str) for n in names):
+        return None
+    return names
+
+
+def _save_listing_cache(kind, mtime, names):
+    cache_file = _listing_cache_file(kind)
+    tmp_file = f"{cache_file}.{uuid4().hex}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"mtime": mtime, "names": names}, f)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        logger.warning(f"failed to save {kind} listing cache: {e}")
+        try:
+            os.remove(tmp_file)
+        except OSError:
+            pass
+
+
+def _list_dir_cached(kind, dir_path, extensions):
+    # stat before scanning so a change made mid-scan invalidates the cache
+    try:
+        mtime = os.stat(dir_path).st_mtime_ns
+    except OSError:
+        return []
+    names = _load_listing_cache(kind, mtime)
+    if names is None:
+        names = _scan_dir(dir_path, extensions)
+        _save_listing_cache(kind, mtime, names)
+    return names
 
 
+@st.cache_data(ttl=3600, show_spinner=False)
 def get_all_fonts():
-    fonts = []
-    for root, dirs, files in os.walk(font_dir):
-        for file in files:
-            if file.endswith(".ttf") or file.endswith(".ttc"):
-                fonts.append(file)
+    fonts = _list_dir_cached("fonts", font_dir, (".ttf", ".ttc"))
     fonts.sort()
     return fonts
 
 
+@st.cache_data(ttl=3600, show_spinner=False)
 def get_all_songs():
-    songs = []
-    for root, dirs, files in os.walk(song_dir):
-        for file in files:
-            if file.endswith(".mp3"):
-                songs.append(file)
-    return songs
+    return _list_dir_cached("songs", song_dir, (".mp3",))
 
 
 def open_task_folder(task_id):
     try:
-        sys = platform.system()
-        path = os.path.join(root_dir, "storage", "tasks", task_id)
-        if os.path.exists(path):
-            if sys == "Windows":
-                os.system(f"start {path}")
-            if sys == "Darwin":
-                os.system(f"open {path}")
+        path = os.path.join(_TASKS_ROOT, task_id)
+        if _OPEN_CMD and os.path.isdir(path):
+            subprocess.Popen(_OPEN_CMD + [path], close_fds=True)
     except Exception as e:
         logger.error(e)
 
 
 def scroll_to_bottom():
-    js = """
-    <script>
-        console.log("scroll_to_bottom");
-        function scroll(dummy_var_to_force_repeat_execution){
-            var sections = parent.document.querySelectorAll('section.main');
-            console.log(sections);
-            for(let index = 0; index<sections.length; index++) {
-                sections[index].scrollTop = sections[index].scrollHeight;
-            }
-        }
-        scroll(1);
-    </script>
-    """
-    st.components.v1.html(js, height=0, width=0)
+    st.components.v1.html(_SCROLL_JS, height=0, width=0)
+
+
+_ROOT_PREFIX = root_dir + os.sep
+_LOG_FORMAT = (
+    "<green>{time:%Y-%m-%d %H:%M:%S}</> | "
+    + "<level>{level}</> | "
+    + '"{file.path}:{line}":<blue> {function}</> '
+    + "- <level>{message}</>"
+    + "\n"
+)
 
 
 def init_log():
@@ -127,18 +211,11 @@ def init_log():
 
     def format_record(record):
         file_path = record["file"].path
-        relative_path = os.path.relpath(file_path, root_dir)
-        record["file"].path = f"./{relative_path}"
-        record["message"] = record["message"].replace(root_dir, ".")
-
-        _format = (
-            "<green>{time:%Y-%m-%d %H:%M:%S}</> | "
-            + "<level>{level}</> | "
-            + '"{file.path}:{line}":<blue> {function}</> '
-            + "- <level>{message}</>"
-            + "\n"
-        )
-        return _format
+        if file_path.startswith(_ROOT_PREFIX):
+            record["file"].path = "./" + file_path.removeprefix(_ROOT_PREFIX)
+        if root_dir in record["message"]:
+            record["message"] = record["message"].replace(root_dir, ".")
+        return _LOG_FORMAT
 
     logger.add(
         sys.stdout,
@@ -148,14 +225,25 @@ def init_log():
     )
 
 
-init_log()
+@st.cache_resource(show_spinner=False)
+def _init_once():
+    init_log()
+    _locales = utils.load_locales(i18n_dir)
+    lang_options = tuple(
+        f"{code} - {ltable.get('Language')}" for code, ltable in _locales.items()
+    )
+    lang_index = {code: i for i, code in enumerate(_locales)}
+    translations = {
+        lang: (ltable.get("Translation") or {}) for lang, ltable in _locales.items()
+    }
+    return _locales, lang_options, lang_index, translations
+
 
-locales = utils.load_locales(i18n_dir)
+locales, _LANG_OPTIONS, _LANG_INDEX, _TR = _init_once()
 
 
 def tr(key):
-    loc = locales.get(st.session_state["ui_language"], {})
-    return loc.get("Translation", {}).get(key, key)
+    return _TR.get(st.session_state["ui_language"], {}).get(key, key)
 
 
 st.write(tr("Get Help"))
@@ -169,15 +257,10 @@ if not config.app.get("hide_config", False):
         middle_config_panel = config_panels[1]
         right_config_panel = config_panels[2]
         with left_config_panel:
-            display_languages = []
-            selected_index = 0
-            for i, code in enumerate(locales.keys()):
-                display_languages.append(f"{code} - {locales[code].get('Language')}")
-                if code == st.session_state["ui_language"]:
-                    selected_index = i
-
             selected_language = st.selectbox(
-                tr("Language"), options=display_languages, index=selected_index
+                tr("Language"),
+                options=_LANG_OPTIONS,
+                index=_LANG_INDEX.get(st.session_state["ui_language"], 0),
             )
             if selected_language:
                 code = selected_language.split(" - ")[0].strip()
@@ -190,42 +273,25 @@ if not config.app.get("hide_config", False):
             config.ui["hide_log"] = hide_log
 
         with middle_config_panel:
-            llm_providers = [
-                "OpenAI",
-                "Moonshot",
-                "Azure",
-                "Qwen",
-                "DeepSeek",
-                "Gemini",
-                "Ollama",
-                "G4f",
-                "OneAPI",
-                "Cloudflare",
-                "ERNIE",
-            ]
             saved_llm_provider = config.app.get("llm_provider", "OpenAI").lower()
-            saved_llm_provider_index = 0
-            for i, provider in enumerate(llm_providers):
-                if provider.lower() == saved_llm_provider:
-                    saved_llm_provider_index = i
-                    break
+            saved_llm_provider_index = _PROVIDER_INDEX.get(saved_llm_provider, 0)
 
             llm_provider = st.selectbox(
                 tr("LLM Provider"),
-                options=llm_providers,
+                options=LLM_PROVIDERS,
                 index=saved_llm_provider_index,
             )
             llm_helper = st.container()
             llm_provider = llm_provider.lower()
             config.app["llm_provider"] = llm_provider
 
-            llm_api_key = config.app.get(f"{llm_provider}_api_key", "")
-            llm_secret_key = config.app.get(
-                f"{llm_provider}_secret_key", ""
-            )
-            llm_base_url = config.app.get(f"{llm_provider}_base_url", "")
-            llm_model_name = config.app.get(f"{llm_provider}_model_name", "")
-            llm_account_id = config.app.get(f"{llm_provider}_account_id", "")
+            llm_prefix = f"{llm_provider}_"
+            llm_config = {k: config.app.get(llm_prefix + k, "") for k in LLM_CONFIG_KEYS}
+            llm_api_key = llm_config["api_key"]
+            llm_secret_key = llm_config["secret_key"]
+            llm_base_url = llm_config["base_url"]
+            llm_model_name = llm_config["model_name"]
+            llm_account_id = llm_config["account_id"]
 
             tips = ""
             if llm_provider == "ollama":
@@ -281,31 +347,42 @@ if not config.app.get("hide_config", False):
 
             if tips:
                 st.markdown(tips, unsafe_allow_html=True)
-            
-            llm_api_key = st.text_input(
-                tr("API Key"), value=llm_api_key, type="password"
-            )
-            llm_secret_key = st.text_input(
-                tr("Secret Key"), value=llm_secret_key, type="password"
-            )
-            llm_base_url = st.text_input(
-                tr("Base Url"), value=llm_base_url
-            )
-            llm_model_name = st.text_input(
-                tr("Model Name"), value=llm_model_name
-            )
-            llm_account_id = st.text_input(
-                tr("Account Id"), value=llm_account_id
-            )
 
-            if st.button(tr("Save")):
-                config.app[f"{llm_provider}_api_key"] = llm_api_key
-                config.app[f"{llm_provider}_secret_key"] = llm_secret_key
-                config.app[f"{llm_provider}_base_url"] = llm_base_url
-                config.app[f"{llm_provider}_model_name"] = llm_model_name
-                config.app[f"{llm_provider}_account_id"] = llm_account_id
-                config.save()
-                st.success(tr("Configuration saved!"))
+            with st.form("llm_settings"):
+                llm_api_key = st.text_input(
+                    tr("API Key"), value=llm_api_key, type="password"
+                )
+                llm_secret_key = st.text_input(
+                    tr("Secret Key"), value=llm_secret_key, type="password"
+                )
+                llm_base_url = st.text_input(
+                    tr("Base Url"), value=llm_base_url
+                )
+                llm_model_name = st.text_input(
+                    tr("Model Name"), value=llm_model_name
+                )
+                llm_account_id = st.text_input(
+                    tr("Account Id"), value=llm_account_id
+                )
+
+                if st.form_submit_button(tr("Save")):
+                    llm_updates = zip(
+                        LLM_CONFIG_KEYS,
+                        (
+                            llm_api_key,
+                            llm_secret_key,
+                            llm_base_url,
+                            llm_model_name,
+                            llm_account_id,
+                        ),
+                    )
+                    for k, v in llm_updates:
+                        config.app[llm_prefix + k] = v
+                    if config.has_unsaved_changes():
+                        config.save_config()
+                        st.success(tr("Configuration saved!"))
+                    else:
+                        st.info(tr("No changes to save"))
 
         with right_config_panel:
             pexels_api_key = config.app.get("pexels_api_key", "")
@@ -366,12 +443,16 @@ def enhanced_logging():
     # Configure enhanced logging
     st.write("Logging enhanced with AI-driven insights.")
 
-recommend_modules()
-handle_errors()
-enhanced_logging()
+if config.app.get("show_diagnostics", False):
+    st.sidebar.checkbox(tr("Show Diagnostics"), key="_show_diag")
+
+if st.session_state.get("_show_diag"):
+    recommend_modules()
+    handle_errors()
+    enhanced_logging()
 
 # Compatibility Functions for Pydantic v2
-class ConfigModel(PydanticV2Model):
+class ConfigModel(BaseModel):
     api_key: str = Field(..., description="API key for LLM service")
     secret_key: Optional[str] = Field(None, description="Secret key for LLM service")
     base_url: Optional[str] = Field(None, description="Base URL for LLM service")
@@ -380,8 +461,7 @@ class ConfigModel(PydanticV2Model):
 
 def validate_config(config_data):
     try:
-        config_model = ConfigModel(**config_data)
-        return config_model
+        return ConfigModel.model_validate(config_data)
     except ValidationError as e:
         logger.error(f"Configuration validation error: {e}")
         return None
@@ -395,8 +475,11 @@ config_data = {
     "account_id": "example_account",
 }
 
-validated_config = validate_config(config_data)
-if validated_config:
-    st.write("Configuration is valid and loaded.")
-else:
-    st.write("Configuration validation failed.")
+if st.session_state.get("_show_diag"):
+    if st.session_state.get("_validated") is None:
+        st.session_state["_validated"] = validate_config(config_data) is not None
+
+    if st.session_state["_validated"]:
+        st.write("Configuration is valid and loaded.")
+    else:
+        st.write("Configuration validation failed.")
@@ -1,3 +1,4 @@
+import copy
 import os
 import socket
 import toml
@@ -31,12 +32,22 @@ def load_config():
     return _config_
 
 
+def _snapshot():
+    return copy.deepcopy({"app": app, "azure": azure, "ui": ui})
+
+
 def save_config():
+    global _saved
     with open(config_file, "w", encoding="utf-8") as f:
         _cfg["app"] = app
         _cfg["azure"] = azure
         _cfg["ui"] = ui
         f.write(toml.dumps(_cfg))
+    _saved = _snapshot()
+
+
+def has_unsaved_changes():
+    return _snapshot() != _saved
 
 
 _cfg = load_config()
@@ -45,6 +56,8 @@ whisper = _cfg.get("whisper", {})
 proxy = _cfg.get("proxy", {})
 azure = _cfg.get("azure", {})
 ui = _cfg.get("ui", {})
+# what is currently on disk, refreshed by save_config()
+_saved = _snapshot()
 
 hostname = socket.gethostname()
 